@@ -10,11 +10,23 @@ import os
 import sys
 import argparse
 import logging
-import atexit
 import time
+import json
+import hashlib
+import fnmatch
+import re
+import shutil
 import subprocess
 import shlex
+import threading
+import concurrent.futures
 from datetime import timedelta
+from dataclasses import dataclass, field
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
 
 
 __version__ = '0.2.2'
@@ -22,28 +34,67 @@ VERSION_STR_SHORT = f'docker-compose-all {__version__}'
 VERSION_STR_LONG = f'docker-compose-all {__version__}\n{__doc__.strip()}'
 
 # https://docs.docker.com/compose/compose-file/03-compose-file/
-DOCKER_COMPOSE_FILENAME_SET = {
+# in compose's documented precedence order
+DOCKER_COMPOSE_FILENAMES = (
     'compose.yaml',
     'compose.yml',
     'docker-compose.yaml',
     'docker-compose.yml',
+)
+DOCKER_COMPOSE_FILENAME_SET = frozenset(DOCKER_COMPOSE_FILENAMES)
+
+# the Go-based Docker Compose v2 plugin, much faster to start than the legacy Python v1 binary
+DOCKER_COMPOSE = ['docker', 'compose']
+DOCKER_COMPOSE_LEGACY = ['docker-compose']
+
+# default docker compose command
+COMMAND_STOP = DOCKER_COMPOSE + ['stop']
+COMMAND_DOWN = DOCKER_COMPOSE + ['down', '--rmi', 'all']
+COMMAND_BUILD = DOCKER_COMPOSE + ['build', '--pull']
+COMMAND_UP = DOCKER_COMPOSE + ['up', '-d']
+COMMAND_PS = DOCKER_COMPOSE + ['ps']
+COMMAND_TOP = DOCKER_COMPOSE + ['top']
+# well-known directories that never contain a Docker Compose project
+SKIP_DIRNAME_SET = frozenset({
+    'node_modules',
+    '__pycache__',
+})
+
+# optional file at the scan root, one glob per line, dir names matching any are not scanned
+IGNORE_FILENAME = '.dcaignore'
+
+# scan result cache, avoid re-walking the tree on back-to-back invocations
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'docker-compose-all')
+CACHE_TTL = 60  # seconds
+
+# remove unused networks, images and build cache in one Docker API round trip
+COMMAND_CLEAN = ('Removing all unused networks, images and build cache', ['docker', 'system', 'prune', '-f'])
+
+FOREGROUND_COLOR_TABLE = {
+    'red': '31',
+    'green': '32',
+    'yellow': '33',
+    'blue': '34',
+    'cyan': '36',
+    'white': '37',
+    'default': '39',
+}
+BACKGROUND_COLOR_TABLE = {
+    'black': '40',
+    'default': '49',
+}
+
+# ANSI color code per log level
+LOG_LEVEL_COLOR_TABLE = {
+    logging.CRITICAL: '31',
+    logging.ERROR: '31',
+    logging.WARNING: '33',
+    logging.INFO: '36',
+    logging.DEBUG: '36',
 }
 
-# default docker-compose command
-COMMAND_STOP = ['docker-compose', 'stop']
-COMMAND_DOWN = ['docker-compose', 'down', '--rmi', 'all']
-COMMAND_BUILD = ['docker-compose', 'build', '--pull']
-COMMAND_UP = ['docker-compose', 'up', '-d']
-COMMAND_PS = ['docker-compose', 'ps']
-COMMAND_TOP = ['docker-compose', 'top']
-COMMAND_CLEAN_NETWORKS = ('Removing all unused networks', ['docker', 'network', 'prune', '-f'])
-COMMAND_CLEAN_IMAGES = ('Remove unused images', ['docker', 'image', 'prune', '-f'])
-COMMAND_CLEAN_BUILDER = ('Remove build cache', ['docker', 'builder', 'prune', '-f'])
-COMMANDS_CLEAN = [
-    COMMAND_CLEAN_NETWORKS,
-    COMMAND_CLEAN_IMAGES,
-    COMMAND_CLEAN_BUILDER,
-]
+# emit ANSI escape sequences only when stdout is a terminal
+_USE_COLOR = sys.stdout.isatty()
 
 logger = logging.getLogger(__name__)
 shell_args = None
@@ -56,7 +107,10 @@ def _assert(expr, msg=''):
 
 def _init_logging():
     logging_stream = sys.stdout
-    logging_format = '\x1b[1m%(asctime)s [%(levelname)s]:\x1b[0m%(message)s'
+    if _USE_COLOR:
+        logging_format = '\x1b[1m%(asctime)s [%(levelname)s]:\x1b[0m%(message)s'
+    else:
+        logging_format = '%(asctime)s [%(levelname)s]:%(message)s'
     logging_level = logging.INFO
 
     if logging_stream.isatty():
@@ -71,11 +125,9 @@ def _init_logging():
         stream=logging_stream,
     )
 
-    logging.addLevelName(logging.CRITICAL, '\x1b[31m{}\x1b[39m'.format(logging.getLevelName(logging.CRITICAL)))
-    logging.addLevelName(logging.ERROR, '\x1b[31m{}\x1b[39m'.format(logging.getLevelName(logging.ERROR)))
-    logging.addLevelName(logging.WARNING, '\x1b[33m{}\x1b[39m'.format(logging.getLevelName(logging.WARNING)))
-    logging.addLevelName(logging.INFO, '\x1b[36m{}\x1b[39m'.format(logging.getLevelName(logging.INFO)))
-    logging.addLevelName(logging.DEBUG, '\x1b[36m{}\x1b[39m'.format(logging.getLevelName(logging.DEBUG)))
+    if _USE_COLOR:
+        for level, color_code in LOG_LEVEL_COLOR_TABLE.items():
+            logging.addLevelName(level, '\x1b[{}m{}\x1b[39m'.format(color_code, logging.getLevelName(level)))
 
 
 def _parse_args(args=sys.argv[1:]):
@@ -101,6 +153,12 @@ def _parse_args(args=sys.argv[1:]):
     dc_opt_group.add_argument('--normi', action='store_true', help='Do NOT remove Docker images when running "docker-compose down"')
     dc_opt_group.add_argument('--nopull', action='store_true', help='Do NOT pull images when running "docker-compose build"')
     dc_opt_group.add_argument('--doclean', action='store_true', help='Clean up before exit, if no error. Remove ALL unused networks, images and build cache. WARN: This may cause data loss.')
+    dc_opt_group.add_argument('--legacy-compose', action='store_true', help='Run the legacy "docker-compose" v1 binary instead of the "docker compose" v2 plugin')
+
+    parser.add_argument('-j', '--jobs', metavar='N', type=int, default=1, help='Run commands in up to N Docker Compose projects in parallel, default: %(default)s')
+    parser.add_argument('--no-cache', action='store_true', help='Do NOT read or write the scan result cache')
+    parser.add_argument('--refresh', action='store_true', help='Ignore the scan result cache and rescan')
+    parser.add_argument('--recurse-into-projects', action='store_true', help='Also scan inside found Docker Compose projects, for nested projects')
 
     parser.add_argument('docker_files_dir', metavar='dir_path', nargs='?', default=default_docker_files_dir, help='A directory which contains Docker Compose projects, default: %(default)r')
 
@@ -114,45 +172,56 @@ def _parse_args(args=sys.argv[1:]):
     
     result.docker_files_dir = os.path.abspath(os.path.expanduser(result.docker_files_dir))
     _assert(os.path.isdir(result.docker_files_dir), f'Dir not found: {result.docker_files_dir!r}')
+    _assert(result.jobs >= 1, f'Invalid --jobs value: {result.jobs!r}')
 
     logger.debug('Command line arguments: %r', result)
 
     return result
 
 
+def _make_ansi_prefix(foreground, background, bold, reverse):
+    options = []
+
+    if bold:
+        options.append('1')
+    if reverse:
+        options.append('7')
+
+    options.append(FOREGROUND_COLOR_TABLE.get(foreground, '39'))
+    if not background is None:
+        options.append(BACKGROUND_COLOR_TABLE.get(background, '49'))
+
+    return '\x1b[' + ';'.join(options) + 'm'
+
+
+# every known combination, computed once at import
+_ANSI_PREFIX_TABLE = {
+    (foreground, background, bold, reverse): _make_ansi_prefix(foreground, background, bold, reverse)
+    for foreground in FOREGROUND_COLOR_TABLE
+    for background in (None,) + tuple(BACKGROUND_COLOR_TABLE)
+    for bold in (False, True)
+    for reverse in (False, True)
+}
+
+_ANSI_RESET = '\x1b[0m'
+
+
 def colored(s, foreground, background=None, **kwargs):
     if kwargs.get('repr', False):
         s = repr(s)
     else:
         s = str(s)
-    
-    foreground_color_table = {
-        'red': '31',
-        'green': '32',
-        'yellow': '33',
-        'blue': '34',
-        'cyan': '36',
-        'white': '37',
-        'default': '39',
-    }
-    background_color_table = {
-        'black': '40',
-        'default': '49',
-    }
-    options = []
 
-    if kwargs.get('bold', False):
-        options.append('1')
-    if kwargs.get('reverse', False):
-        options.append('7')
+    if not _USE_COLOR:
+        return s
 
-    options.append(foreground_color_table.get(foreground, '39'))
-    if not background is None:
-        options.append(background_color_table.get(background, '49'))
+    key = (foreground, background, kwargs.get('bold', False), kwargs.get('reverse', False))
+    code = _ANSI_PREFIX_TABLE.get(key)
+    if code is None:
+        # unknown color names fall back to terminal defaults
+        code = _make_ansi_prefix(*key)
 
-    code = '\x1b[' + ';'.join(options) + 'm'
-    code_end = '\x1b[0m'
-    return code + s + code_end
+    return code + s + _ANSI_RESET
 
 
 def get_command_str(command):
@@ -161,67 +230,289 @@ def get_command_str(command):
 
 def check_system():
     logger.info('Checking Docker & Docker Compose installation')
-    commands = [
-        ['docker', '--version'],
-        ['docker-compose', '--version'],
-    ]
 
-    for command in commands:
-        try:
-            subprocess.check_call(command)
-        except Exception as e:
-            logger.error('Error when running %s: %r %r', colored(get_command_str(command), 'red', bold=True), type(e), e)
+    # a pure userspace PATH scan, no process spawned
+    binaries = ['docker']
+    if shell_args.legacy_compose:
+        binaries.append('docker-compose')
+
+    for binary in binaries:
+        if shutil.which(binary) is None:
+            logger.error('Not found in PATH: %s', colored(binary, 'red', bold=True))
             return False
 
-    return True
+    if shell_args.verbose >= 1:
+        commands = [['docker', '--version']]
+        if shell_args.legacy_compose:
+            commands.append(['docker-compose', '--version'])
+        else:
+            commands.append(['docker', 'compose', 'version'])
+    elif not shell_args.legacy_compose:
+        # the v2 plugin is not a binary in PATH, ask the docker CLI whether it exists
+        commands = [['docker', 'compose', 'version']]
+    else:
+        commands = []
+
+    if len(commands) == 0:
+        return True
+
+    result = True
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(commands)) as executor:
+        futures = [executor.submit(subprocess.run, command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True) for command in commands]
+        for command, future in zip(commands, futures):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error('Error when running %s: %r %r', colored(get_command_str(command), 'red', bold=True), type(e), e)
+                if getattr(e, 'stderr', None):
+                    logger.error('stderr: %s', e.stderr.decode(errors='replace').strip())
+                result = False
+
+    return result
+
+
+def _load_ignore_patterns(dir_path):
+    """Read glob patterns from .dcaignore at the scan root, one per line, # comments allowed"""
+
+    ignore_file = os.path.join(dir_path, IGNORE_FILENAME)
+    patterns = []
+    try:
+        with open(ignore_file, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    patterns.append(re.compile(fnmatch.translate(line)))
+    except OSError:
+        return []
+
+    logger.debug('Loaded %d ignore patterns from %r', len(patterns), ignore_file)
+    return patterns
+
+
+def _walk(dir_path):
+    """Yield directories containing a Docker Compose file, based on os.scandir().
+
+    os.scandir() reuses the file type returned by the kernel when listing a directory,
+    avoiding an extra stat() per entry. An explicit stack is used instead of recursion.
+    Hidden directories (e.g. .git) are skipped, and matched directories are not descended
+    into: a Docker Compose project's sub dirs are build contexts and volumes, not projects.
+    """
+
+    recurse_into_projects = shell_args is not None and shell_args.recurse_into_projects
+    filename_set = DOCKER_COMPOSE_FILENAME_SET
+    ignore_patterns = _load_ignore_patterns(dir_path)
+    stack = [dir_path]
+    while stack:
+        current_dir = stack.pop()
+        sub_dirs = []
+        found = False
+        try:
+            with os.scandir(current_dir) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=True):
+                            if (
+                                not entry.name.startswith('.')
+                                and entry.name not in SKIP_DIRNAME_SET
+                                and not any(pattern.match(entry.name) for pattern in ignore_patterns)
+                            ):
+                                sub_dirs.append(entry.path)
+                        elif not found and entry.name in filename_set:
+                            found = True
+                            if not recurse_into_projects:
+                                # matched dirs are not descended into, stop listing early
+                                break
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+        if found:
+            yield current_dir
+        if not found or recurse_into_projects:
+            stack.extend(sub_dirs)
 
 
 def scan_dirs(dir_path):
     """Scan and show Docker Compose projects"""
 
+    # walking an absolute root yields absolute paths, no per-dir abspath() needed
+    dir_path = os.path.abspath(dir_path)
+
     docker_compose_dirs = []
+    seen = set()
     logger.info('Scanning %s ...', colored(dir_path, 'cyan', bold=True, repr=True))
-    for top, __, files in os.walk(dir_path, followlinks=True):
-        dir_path = os.path.abspath(top)
-
-        if set(files) & DOCKER_COMPOSE_FILENAME_SET and dir_path not in docker_compose_dirs:
-            logger.info('Found: %s', colored(dir_path, 'cyan', repr=True))
-            docker_compose_dirs.append(dir_path)
+    for top in _walk(dir_path):
+        if top not in seen:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info('Found: %s', colored(top, 'cyan', repr=True))
+            seen.add(top)
+            docker_compose_dirs.append(top)
 
     logger.info('Found %s Docker Compose projects', colored(len(docker_compose_dirs), 'default', bold=True))
     return docker_compose_dirs
 
 
+def _cache_file_path(dir_path):
+    return os.path.join(CACHE_DIR, hashlib.sha1(dir_path.encode('utf-8')).hexdigest() + '.json')
+
+
+def _scan_fingerprint(dir_path):
+    """Scan-affecting inputs stored in the cache, any mismatch is a cache miss"""
+
+    try:
+        with open(os.path.join(dir_path, IGNORE_FILENAME), 'rb') as f:
+            ignore_digest = hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        ignore_digest = ''
+
+    return {
+        'recurse_into_projects': shell_args is not None and shell_args.recurse_into_projects,
+        'ignore_digest': ignore_digest,
+    }
+
+
+def load_cached_dirs(dir_path):
+    """Load a recent scan result for dir_path, return None on cache miss"""
+
+    cache_file = _cache_file_path(dir_path)
+    try:
+        with open(cache_file, 'r') as f:
+            cache = json.load(f)
+
+        if time.time() - cache['time'] > CACHE_TTL:
+            logger.debug('Cache file %r expired', cache_file)
+            return None
+
+        if cache['mtime_ns'] != os.stat(dir_path).st_mtime_ns:
+            logger.debug('Cache file %r stale: %r changed', cache_file, dir_path)
+            return None
+
+        if cache['scan_fingerprint'] != _scan_fingerprint(dir_path):
+            logger.debug('Cache file %r stale: scan options changed', cache_file)
+            return None
+
+        # a nested project can disappear without changing the root mtime
+        if not all(os.path.isdir(cached_dir) for cached_dir in cache['dirs']):
+            logger.debug('Cache file %r stale: cached dir no longer exists', cache_file)
+            return None
+
+        return cache['dirs']
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.debug('Error reading cache file %r: %r', cache_file, e)
+        return None
+
+
+def save_cached_dirs(dir_path, docker_compose_dirs):
+    cache_file = _cache_file_path(dir_path)
+    try:
+        cache = {
+            'time': time.time(),
+            'mtime_ns': os.stat(dir_path).st_mtime_ns,
+            'scan_fingerprint': _scan_fingerprint(dir_path),
+            'dirs': docker_compose_dirs,
+        }
+
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_file = cache_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(cache, f)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.debug('Error writing cache file %r: %r', cache_file, e)
+
+
 def clean():
     logger.info('Cleanning up')
-    for desc, command in COMMANDS_CLEAN:
-        logger.info(desc)
-        logger.info('Running %s', colored(get_command_str(command), 'green', bold=True))
-        subprocess.call(command)
+    desc, command = COMMAND_CLEAN
+    logger.info(desc)
+    logger.info('Running %s', colored(get_command_str(command), 'green', bold=True))
+    subprocess.call(command)
 
 
-error_info_list = []
-def all_run_commands(docker_compose_dirs, commands):
-    error_dirs = []
+@dataclass
+class ErrorCollector:
+    """Collect per-directory command failures, safe to share across worker threads"""
+
+    error_info_list: list = field(default_factory=list)
+    error_dirs: set = field(default_factory=set)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, dir_path, error_info):
+        with self.lock:
+            self.error_info_list.append(error_info)
+            self.error_dirs.add(dir_path)
+
+
+error_collector = ErrorCollector()
+
+
+def _run_single_command(dir_path, command):
+    """Run a command in a directory, capturing interleaved stdout/stderr"""
+    return subprocess.run(command, cwd=dir_path, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+
+def _all_run_command_parallel(docker_compose_dirs, command, cmd_str, cmd_colored):
+    with concurrent.futures.ThreadPoolExecutor(max_workers=shell_args.jobs) as executor:
+        futures = []
+        for dir_path in docker_compose_dirs:
+            if dir_path in error_collector.error_dirs:
+                futures.append(None)
+            else:
+                futures.append(executor.submit(_run_single_command, dir_path, command))
 
+        for i, (dir_path, future) in enumerate(zip(docker_compose_dirs, futures)):
+            if future is None:
+                logger.warning('Skiped %s because error happened', colored(dir_path, 'green', repr=True))
+                continue
+
+            try:
+                completed = future.result()
+            except OSError as e:
+                error_info = 'Dir: %r, Command: %s, Error: %r: %r' % (dir_path, cmd_str, type(e), e)
+                logger.error(colored(error_info, 'red', bold=True))
+
+                error_collector.add(dir_path, error_info)
+                continue
+
+            if logger.isEnabledFor(logging.INFO):
+                logger.info('Finished %s in %s (%d/%d)', cmd_colored, colored(dir_path, 'green', repr=True), i + 1, len(docker_compose_dirs))
+            output = completed.stdout.decode(errors='replace')
+            if output:
+                sys.stdout.write(output)
+
+            if completed.returncode != 0:
+                e = subprocess.CalledProcessError(completed.returncode, command, output=completed.stdout)
+                error_info = 'Dir: %r, Command: %s, Error: %r: %r, Last output: %r' % (dir_path, cmd_str, type(e), e, output[-256:])
+                logger.error(colored(error_info, 'red', bold=True))
+
+                error_collector.add(dir_path, error_info)
+
+
+def all_run_commands(docker_compose_dirs, commands):
     for command in commands:
-        logger.info('Running %s in all Docker Compose projects', colored(get_command_str(command), 'green', bold=True))
+        cmd_str = get_command_str(command)
+        cmd_colored = colored(cmd_str, 'green')
+        logger.info('Running %s in all Docker Compose projects', colored(cmd_str, 'green', bold=True))
+
+        if shell_args.jobs > 1:
+            _all_run_command_parallel(docker_compose_dirs, command, cmd_str, cmd_colored)
+            continue
 
         for i, dir_path in enumerate(docker_compose_dirs):
-            logger.info('Running %s in %s (%d/%d)', colored(get_command_str(command), 'green'), colored(dir_path, 'green', repr=True), i + 1, len(docker_compose_dirs))
-            if dir_path in error_dirs:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info('Running %s in %s (%d/%d)', cmd_colored, colored(dir_path, 'green', repr=True), i + 1, len(docker_compose_dirs))
+            if dir_path in error_collector.error_dirs:
                 logger.warning('Skiped because error happened')
                 continue
 
-            os.chdir(dir_path)
             try:
-                subprocess.check_call(command)
-            except subprocess.CalledProcessError as e:
-                error_info = 'Dir: %r, Command: %s, Error: %r: %r' % (dir_path, get_command_str(command), type(e), e)
+                subprocess.check_call(command, cwd=dir_path)
+            except (subprocess.CalledProcessError, OSError) as e:
+                error_info = 'Dir: %r, Command: %s, Error: %r: %r' % (dir_path, cmd_str, type(e), e)
                 logger.error(colored(error_info, 'red', bold=True))
 
-                error_info_list.append(error_info)
-                error_dirs.append(dir_path)
+                error_collector.add(dir_path, error_info)
 
 
 def all_restart(docker_compose_dirs):
@@ -259,35 +550,94 @@ def all_stop(docker_compose_dirs):
     all_run_commands(docker_compose_dirs, [COMMAND_STOP])
 
 
-def update_docker_compose_commands():
-    global COMMAND_DOWN, COMMAND_BUILD, COMMAND_STOP
-
-    if shell_args.normi:
-        COMMAND_DOWN = ['docker-compose', 'down']
+def validate_compose_files(docker_compose_dirs):
+    """Cheaply parse each project's compose file before spawning any docker compose process.
+
+    Broken files are reported and their dirs dropped, saving a full compose startup per
+    broken project. Needs PyYAML, silently skipped when it is not installed.
+    """
+
+    if yaml is None:
+        logger.debug('PyYAML not installed, skip compose file validation')
+        return docker_compose_dirs
+    if len(docker_compose_dirs) == 0:
+        return docker_compose_dirs
+
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+    def _validate(dir_path):
+        # check the same file compose itself would load
+        for filename in DOCKER_COMPOSE_FILENAMES:
+            file_path = os.path.join(dir_path, filename)
+            if os.path.isfile(file_path):
+                try:
+                    with open(file_path, 'rb') as f:
+                        yaml.load(f, Loader=loader)
+                except yaml.constructor.ConstructorError as e:
+                    # compose-spec tags like !reset / !override are not plain YAML
+                    logger.debug('Ignoring constructor error in %r: %r', file_path, e)
+                except yaml.YAMLError as e:
+                    return 'Dir: %r, Broken compose file: %r, Error: %r' % (dir_path, file_path, e)
+                return None
+        return None
+
+    logger.debug('Validating compose files in %d projects', len(docker_compose_dirs))
+    result = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(docker_compose_dirs), 8)) as executor:
+        futures = [executor.submit(_validate, dir_path) for dir_path in docker_compose_dirs]
+        for dir_path, future in zip(docker_compose_dirs, futures):
+            error_info = future.result()
+            if error_info is None:
+                result.append(dir_path)
+            else:
+                logger.error(colored(error_info, 'red', bold=True))
+                error_collector.add(dir_path, error_info)
 
-    if shell_args.nopull:
-        COMMAND_BUILD = ['docker-compose', 'build']
+    return result
 
-    if shell_args.dokill:
-        COMMAND_STOP = ['docker-compose', 'kill']
 
+# argparse option name -> handler, options are mutually exclusive
+ACTION_TABLE = {
+    'restart': all_restart,
+    'stop': all_stop,
+    'down': all_down,
+    'build': all_build,
+    'up': all_up,
+    'ps': all_ps,
+    'top': all_top,
+}
 
-def main():
-    global shell_args
 
-    _init_logging()
-    shell_args = _parse_args()
+def update_docker_compose_commands():
+    global COMMAND_STOP, COMMAND_DOWN, COMMAND_BUILD, COMMAND_UP, COMMAND_PS, COMMAND_TOP
 
-    if sys.stdout.isatty():
-        atexit.register(lambda: logger.info('Exiting'))
+    if shell_args.legacy_compose:
+        docker_compose = DOCKER_COMPOSE_LEGACY
     else:
-        atexit.register(lambda: logger.info('Exiting\n'))
+        docker_compose = DOCKER_COMPOSE
+
+    build_command = ['build']
+    if not shell_args.nopull:
+        build_command.append('--pull')
+    if shell_args.legacy_compose:
+        # Compose v2 builds services in parallel by default, v1 needs the flag
+        build_command.append('--parallel')
 
-    _start_time_stamp = time.time()
-    atexit.register(lambda: logger.info('Time elapsed: %s', timedelta(seconds=int(time.time() - _start_time_stamp))))
+    COMMAND_STOP = docker_compose + (['kill'] if shell_args.dokill else ['stop'])
+    COMMAND_DOWN = docker_compose + (['down'] if shell_args.normi else ['down', '--rmi', 'all'])
+    COMMAND_BUILD = docker_compose + build_command
+    COMMAND_UP = docker_compose + ['up', '-d']
+    COMMAND_PS = docker_compose + ['ps']
+    COMMAND_TOP = docker_compose + ['top']
 
+
+def _main():
     logger.info(colored(VERSION_STR_SHORT, 'default', bold=True))
 
+    # Calls passing cwd= do not qualify for posix_spawn, but CPython >= 3.10 spawns
+    # them via vfork instead of fork, which is just as cheap. Only worth a debug note.
+    logger.debug('subprocess posix_spawn support: %r', getattr(subprocess, '_USE_POSIX_SPAWN', False))
+
     update_docker_compose_commands()
 
     # Run as root, after argparse (could show help)
@@ -301,26 +651,28 @@ def main():
         logger.error(colored('Docker & Docker Compose installation incomplete', 'red', bold=True))
         sys.exit(1)
 
-    docker_compose_dirs = scan_dirs(shell_args.docker_files_dir)
-
-    if shell_args.restart:
-        all_restart(docker_compose_dirs)
-    elif shell_args.down:
-        all_down(docker_compose_dirs)
-    elif shell_args.build:
-        all_build(docker_compose_dirs)
-    elif shell_args.up:
-        all_up(docker_compose_dirs)
-    elif shell_args.ps:
-        all_ps(docker_compose_dirs)
-    elif shell_args.top:
-        all_top(docker_compose_dirs)
-    elif shell_args.stop:
-        all_stop(docker_compose_dirs)
-    
-    if len(error_info_list) > 0:
+    docker_compose_dirs = None
+    if not shell_args.no_cache and not shell_args.refresh:
+        docker_compose_dirs = load_cached_dirs(shell_args.docker_files_dir)
+        if docker_compose_dirs is not None:
+            logger.info('Loaded %s Docker Compose projects from cache', colored(len(docker_compose_dirs), 'default', bold=True))
+
+    if docker_compose_dirs is None:
+        docker_compose_dirs = scan_dirs(shell_args.docker_files_dir)
+        if not shell_args.no_cache:
+            save_cached_dirs(shell_args.docker_files_dir, docker_compose_dirs)
+
+    docker_compose_dirs = validate_compose_files(docker_compose_dirs)
+
+    # run without an action only scans and shows projects
+    for action, action_func in ACTION_TABLE.items():
+        if getattr(shell_args, action):
+            action_func(docker_compose_dirs)
+            break
+
+    if len(error_collector.error_info_list) > 0:
         logger.info('After run all commands, errors:')
-        for error_info in error_info_list:
+        for error_info in error_collector.error_info_list:
             logger.error(colored(error_info, 'red', bold=True))
         
         if shell_args.doclean:
@@ -335,5 +687,24 @@ def main():
         logger.info('Command %s exit with no error', colored(get_command_str(sys.argv), 'default', bold=True))
 
 
+def main():
+    global shell_args
+
+    _init_logging()
+
+    # parse before the timed block, so --help / --version exit without the banner
+    shell_args = _parse_args()
+
+    start_time = time.monotonic()
+    try:
+        _main()
+    finally:
+        logger.info('Time elapsed: %s', timedelta(seconds=int(time.monotonic() - start_time)))
+        if sys.stdout.isatty():
+            logger.info('Exiting')
+        else:
+            logger.info('Exiting\n')
+
+
 if __name__ == '__main__':
     main()
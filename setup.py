@@ -32,5 +32,5 @@ setup(
         'License :: OSI Approved :: GNU General Public License v3 (GPLv3)',
         'Programming Language :: Python :: 3',
     ],
-    python_requires = '>=3.6'
+    python_requires = '>=3.7'
 )